@@ -0,0 +1,267 @@
+# ---------------------------------------------------------------------------
+# Copyright (c) 2023-2026 Tabito's Works. All rights reserved.
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+# ---------------------------------------------------------------------------
+"""シミュレータのベンチマーク
+
+RedfishViewer の自動検索と同じ順路（GET して @odata.id / href をすべて取り出し、重複を除いてたどる）で
+ツリーを巡回し、シナリオごとにリクエスト数/秒、レイテンシ (p50/p95/p99)、転送量を測る。
+
+    cold        : 起動直後のサーバーを巡回する（生成・圧縮・$expand のキャッシュが空の状態）
+    warm        : もう一度巡回する（キャッシュ済みの状態）
+    conditional : warm で得た ETag を If-None-Match に付けて全リソースを取り直す
+    expand      : すべての GET に $expand を付けて巡回する（埋め込まれたリソースは取りに行かない）
+
+使い方:
+
+    $ python bench.py --url http://localhost:8000 --concurrency 32 --json result.json
+    $ python bench.py --baseline result.json            # 前回の結果と比べる
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+import httpx                                        # pip install httpx
+
+SCENARIOS = ("cold", "warm", "conditional", "expand")
+
+
+def links(value, embedded: list):
+    """@odata.id / href をすべて列挙する（埋め込まれたリソースは embedded にも入れる）"""
+    if isinstance(value, dict):
+        if isinstance(value.get("@odata.id"), str) and len(value) > 1:
+            embedded.append(value["@odata.id"])
+        for k, v in value.items():
+            if k in ("@odata.id", "href", "Members@odata.nextLink") and isinstance(v, str):
+                yield v
+            else:
+                yield from links(v, embedded)
+    elif isinstance(value, list):
+        for v in value:
+            yield from links(v, embedded)
+
+
+def normalize(uri: str) -> str:
+    """重複判定用の URI（フラグメントと末尾の / を除く。クエリは残す）"""
+    return uri.split("#", 1)[0].rstrip("/")
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+class Crawl:
+    """1 シナリオ分の巡回と集計"""
+
+    def __init__(self, client: httpx.AsyncClient, root: str, concurrency: int, limit: int = 0, expand: str | None = None, etags: dict[str, str] | None = None):
+        self.client = client
+        self.root = root
+        self.concurrency = concurrency
+        self.limit = limit
+        self.expand = expand
+        self.etags = etags                          # 指定があれば条件付き GET にする
+        self.latencies: list[float] = []
+        self.statuses: dict[int, int] = {}
+        self.bytes = 0
+        self.errors = 0
+        self.seen: set[str] = set()
+        self.found: dict[str, str] = {}             # URI → ETag（次のシナリオ用）
+        self.follow = True                          # リンクをたどるか
+
+    def _enqueue(self, queue: asyncio.Queue, uri: str):
+        key = normalize(uri)
+        if not key.startswith(self.root) or key in self.seen:
+            return
+        if self.limit and len(self.seen) >= self.limit:
+            return
+        self.seen.add(key)
+        queue.put_nowait(key)
+
+    async def _fetch(self, queue: asyncio.Queue, uri: str):
+        headers = {}
+        params = {}
+        if self.etags is not None and uri in self.etags:
+            headers["If-None-Match"] = self.etags[uri]
+        if self.expand is not None and "?" not in uri:
+            params["$expand"] = self.expand
+        start = time.perf_counter()
+        try:
+            response = await self.client.get(uri, headers=headers, params=params)
+            content = await response.aread()
+        except httpx.HTTPError:
+            self.errors += 1
+            return
+        self.latencies.append((time.perf_counter() - start) * 1000)
+        self.statuses[response.status_code] = self.statuses.get(response.status_code, 0) + 1
+        self.bytes += response.num_bytes_downloaded
+        if response.status_code >= 400:
+            self.errors += 1
+            return
+        if "ETag" in response.headers:
+            self.found[uri] = response.headers["ETag"]
+        if response.status_code == 304 or not self.follow:
+            return
+        try:
+            doc = json.loads(content)
+        except ValueError:
+            return
+        embedded: list[str] = []
+        children = list(links(doc, embedded))
+        # 埋め込まれて届いたリソースは取りに行かない
+        for key in embedded:
+            self.seen.add(normalize(key))
+        for child in children:
+            self._enqueue(queue, child)
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            uri = await queue.get()
+            try:
+                await self._fetch(queue, uri)
+            finally:
+                queue.task_done()
+
+    async def run(self, uris: list[str] | None = None) -> dict:
+        """巡回する（uris を指定すればリンクをたどらずにそれだけを取る）"""
+        queue: asyncio.Queue = asyncio.Queue()
+        if uris is None:
+            self._enqueue(queue, self.root)
+        else:
+            self.follow = False
+            self.seen.update(uris)
+            for uri in uris:
+                queue.put_nowait(uri)
+        workers = [asyncio.create_task(self._worker(queue)) for _ in range(self.concurrency)]
+        start = time.perf_counter()
+        await queue.join()
+        elapsed = time.perf_counter() - start
+        for worker in workers:
+            worker.cancel()
+        latencies = sorted(self.latencies)
+        return {
+            "requests": len(latencies),
+            "resources": len(self.seen),
+            "errors": self.errors,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "seconds": round(elapsed, 3),
+            "rps": round(len(latencies) / elapsed, 1) if elapsed else 0,
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+            "max_ms": round(latencies[-1], 3) if latencies else 0,
+            "bytes": self.bytes,
+        }
+
+
+async def bench(args) -> dict:
+    headers = {"Accept-Encoding": args.accept_encoding}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, headers=headers, limits=limits, timeout=args.timeout, auth=args.auth) as client:
+        # サーバーが既に応答していれば cold はキャッシュが温まっている可能性がある
+        before = await server_metrics(client)
+        results = {}
+        etags: dict[str, str] = {}
+        for scenario in args.scenarios:
+            if scenario == "conditional":
+                # ETag が無ければ先に一度巡回して集める（集計には含めない）
+                if not etags:
+                    crawl = Crawl(client, args.root, args.concurrency, args.limit)
+                    await crawl.run()
+                    etags = crawl.found
+                crawl = Crawl(client, args.root, args.concurrency, etags=etags)
+                results[scenario] = await crawl.run(list(etags))
+            elif scenario == "expand":
+                crawl = Crawl(client, args.root, args.concurrency, args.limit, expand=args.expand)
+                results[scenario] = await crawl.run()
+            else:
+                crawl = Crawl(client, args.root, args.concurrency, args.limit)
+                results[scenario] = await crawl.run()
+                etags = crawl.found
+            print(format_row(scenario, results[scenario]), file=sys.stderr)
+        warnings = []
+        if before is not None and "cold" in args.scenarios and any(name.startswith("GET /redfish") for name in before.get("routes", {})):
+            warnings.append("the server had already served Redfish requests before the cold scenario")
+        return {
+            "url": args.url,
+            "root": args.root,
+            "concurrency": args.concurrency,
+            "accept_encoding": args.accept_encoding,
+            "expand": args.expand,
+            "scenarios": results,
+            "warnings": warnings,
+            "server": await server_metrics(client),
+        }
+
+
+async def server_metrics(client: httpx.AsyncClient) -> dict | None:
+    """サーバーのルートごとの集計（/metrics が無ければ None）"""
+    try:
+        response = await client.get("/metrics", headers={"Accept-Encoding": "identity"})
+        return response.json() if response.status_code == 200 else None
+    except (httpx.HTTPError, ValueError):
+        return None
+
+
+def format_row(scenario: str, result: dict) -> str:
+    return (f"{scenario:<12} {result['requests']:>8} req {result['rps']:>10.1f} req/s "
+            f"p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  p99 {result['p99_ms']:>8.2f} ms  "
+            f"{result['bytes']:>12} bytes  {result['errors']} errors")
+
+
+def compare(baseline: dict, current: dict) -> list[str]:
+    """前回の結果からの変化（rps と p95）"""
+    lines = []
+    for scenario, result in current["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(scenario)
+        if old is None:
+            continue
+        change = [f"{scenario:<12}"]
+        for key in ("rps", "p95_ms", "bytes"):
+            if old[key]:
+                change.append(f"{key} {old[key]} -> {result[key]} ({(result[key] - old[key]) / old[key]:+.1%})")
+        lines.append("  ".join(change))
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Redfish simulator by crawling it like RedfishViewer's auto-dive.")
+    parser.add_argument("--url", default="http://localhost:8000", help="simulator base URL")
+    parser.add_argument("--root", default="/redfish/v1", help="crawl root (only URIs under it are followed)")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent requests")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma-separated scenarios ({', '.join(SCENARIOS)})")
+    parser.add_argument("--limit", type=int, default=0, help="maximum resources per crawl (0: no limit)")
+    parser.add_argument("--expand", default=".", help="$expand value for the expand scenario")
+    parser.add_argument("--accept-encoding", default="identity", help="Accept-Encoding header (e.g. gzip, br)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="request timeout in seconds")
+    parser.add_argument("--user", help="BASIC auth user:password")
+    parser.add_argument("--json", metavar="PATH", help="write the results as JSON ('-' for stdout)")
+    parser.add_argument("--baseline", metavar="PATH", help="compare with a previous --json result")
+    args = parser.parse_args()
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    args.auth = tuple(args.user.split(":", 1)) if args.user else None
+    result = asyncio.run(bench(args))
+    for warning in result["warnings"]:
+        print(f"warning: {warning}", file=sys.stderr)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            for line in compare(json.load(f), result):
+                print(line, file=sys.stderr)
+    if args.json == "-":
+        json.dump(result, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# ---------------------------------------------------------------------------
+# Copyright (c) 2023-2026 Tabito's Works. All rights reserved.
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+# ---------------------------------------------------------------------------
+import json
+from collections.abc import Iterator
+
+from store import Members, Resource, encode, etag
+
+PLACEHOLDER = "@@Members@@"                         # Members の差し込み位置
+
+
+def is_collection(resource: Resource) -> bool:
+    return resource.collection
+
+
+def parse(value: str | None, name: str) -> int | None:
+    """$top / $skip の値を検証する（不正なら ValueError(メッセージID, メッセージ)）"""
+    if value is None:
+        return None
+    # isdigit だけでは "²" なども通ってしまう
+    if not (value.isascii() and value.isdigit()):
+        raise ValueError("Base.1.0.QueryParameterValueTypeError", f"The value '{value}' for the query parameter {name} is of a different type than the parameter can accept.")
+    return int(value)
+
+
+class Page:
+    """コレクションの一部（$skip/$top とサーバー側ページサイズを適用したもの。query は nextLink に引き継ぐクエリ）"""
+
+    def __init__(self, resource: Resource, uri: str, skip: int | None, top: int | None, page_size: int = 0, query: str = ""):
+        self.resource = resource
+        self.members = resource.doc["Members"]
+        total = len(self.members)
+        self.start = min(skip or 0, total)
+        requested = total if top is None else min(total, self.start + top)
+        self.stop = requested if page_size <= 0 else min(requested, self.start + page_size)
+        # サーバー側で切り詰めたときだけ続きを案内する
+        self.next_link = None
+        if self.stop < requested:
+            self.next_link = f"{uri}?$skip={self.stop}" + ("" if top is None else f"&$top={requested - self.stop}") + (f"&{query}" if query else "")
+        self.whole = self.start == 0 and self.stop == total
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    @property
+    def etag(self) -> str:
+        if self.whole:
+            return self.resource.etag
+        return etag(f"{self.resource.etag};{self.start};{self.stop}".encode("utf-8"))
+
+    def document(self, members) -> dict:
+        """Members を members に置き換えたドキュメント（続きがあれば nextLink を付ける）"""
+        doc = {}
+        for key, value in self.resource.doc.items():
+            if key == "Members@odata.nextLink":
+                continue
+            doc[key] = members if key == "Members" else value
+            if key == "Members" and self.next_link is not None:
+                doc["Members@odata.nextLink"] = self.next_link
+        return doc
+
+    def chunks(self, chunk_size: int = 1024) -> Iterator[bytes]:
+        """レスポンス本文を少しずつエンコードして返す"""
+        head, tail = encode(self.document(PLACEHOLDER)).split(json.dumps(PLACEHOLDER).encode("utf-8"), 1)
+        yield head + b"["
+        for i in range(self.start, self.stop, chunk_size):
+            j = min(i + chunk_size, self.stop)
+            if isinstance(self.members, Members):
+                body = self.members.encoded(i, j)
+            else:
+                body = encode(self.members[i:j])[1:-1]
+            yield body if i == self.start else b"," + body
+        yield b"]" + tail
@@ -0,0 +1,83 @@
+# ---------------------------------------------------------------------------
+# Copyright (c) 2023-2026 Tabito's Works. All rights reserved.
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+# ---------------------------------------------------------------------------
+import gzip
+import zlib
+from collections.abc import Iterator
+
+try:
+    import brotli                                   # 任意（pip install brotli）
+except ImportError:
+    brotli = None
+
+# 優先順（brotli が無ければ gzip のみ）
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(header: str | None, available=ENCODINGS) -> str | None:
+    """Accept-Encoding から使うエンコーディングを available の中から選ぶ（圧縮しないなら None）"""
+    if not header:
+        return None
+    accepted: dict[str, float] = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name.strip().lower()] = q
+    wildcard = accepted.get("*", 0.0)
+    candidates = [(accepted.get(encoding, wildcard), -i, encoding) for i, encoding in enumerate(ENCODINGS) if encoding in available]
+    if not candidates:
+        return None
+    q, _, encoding = max(candidates)
+    return encoding if q > 0 else None
+
+
+def tag(etag: str, encoding: str | None) -> str:
+    """表現ごとに異なる強い ETag にする（"abc" → "abc-gzip"）"""
+    return etag if encoding is None else etag[:-1] + "-" + encoding + '"'
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """キャッシュ用に最大圧縮率で圧縮する（一度しか払わないため）"""
+    if encoding == "br":
+        return brotli.compress(bytes(body), quality=11)
+    return gzip.compress(body, compresslevel=9, mtime=0)
+
+
+def variant(resource, encoding: str) -> bytes:
+    """圧縮済みの本文を返す（初回だけ圧縮して resource.variants に保持し、保持しているキャッシュに大きさを数えさせる）"""
+    body = resource.variants.get(encoding)
+    if body is None:
+        body = resource.variants[encoding] = compress(resource.body, encoding)
+        if resource.owner is not None:
+            resource.owner(resource, len(body))
+        else:
+            resource.size += len(body)
+    return body
+
+
+def stream(chunks: Iterator[bytes], encoding: str) -> Iterator[bytes]:
+    """チャンクを順に圧縮して返す（キャッシュしない本文用）"""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=5)
+        for chunk in chunks:
+            data = compressor.process(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)       # wbits=31 で gzip 形式
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,96 @@
+# ---------------------------------------------------------------------------
+# Copyright (c) 2023-2026 Tabito's Works. All rights reserved.
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+# ---------------------------------------------------------------------------
+import asyncio
+import itertools
+from collections.abc import AsyncIterator
+from datetime import datetime, timezone
+
+from store import encode
+
+FORMATS = ("Event", "MetricReport")
+QUEUE_SIZE = 64                                     # 購読者ごとの未送信フレーム数（溢れたら古いものから捨てる）
+KEEP_ALIVE = 15.0                                   # この秒数だけ送るものが無ければコメント行を送る
+
+
+def parse_filter(value: str | None) -> set[str]:
+    """SSE の $filter（EventFormatType eq ... のみ対応）を検証する（不正なら ValueError(メッセージID, メッセージ)）"""
+    if value is None:
+        return set(FORMATS)
+    formats = set()
+    for term in value.split(" or "):
+        name, _, format = term.strip().strip("()").partition(" eq ")
+        if name.strip() != "EventFormatType" or format.strip() not in FORMATS:
+            raise ValueError("Base.1.0.QueryParameterValueFormatError", f"The value '{value}' for the query parameter $filter is of a different format than the parameter can accept.")
+        formats.add(format.strip())
+    return formats
+
+
+class EventService:
+    """Server-Sent Events で Event / MetricReport を全購読者に配信する"""
+
+    def __init__(self, queue_size: int = QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self._subscribers: dict[asyncio.Queue, set[str]] = {}
+        self._ids = itertools.count(1)
+
+    def start(self):
+        """配信に使うイベントループを記録する（起動時にループ内で呼ぶ）"""
+        self.loop = asyncio.get_running_loop()
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, format: str, payload: dict):
+        """payload を 1 回だけエンコードして全購読者のキューに入れる（別スレッドからも呼べる）"""
+        if self.loop is None or not self._subscribers:
+            return
+        id = next(self._ids)
+        doc = {"@odata.type": "#Event.v1_7_0.Event", "Id": str(id), "Name": "Event", **payload} if format == "Event" else payload
+        frame = b"id: %d\ndata: %s\n\n" % (id, encode(doc))
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self._fan_out(format, frame)
+        else:
+            self.loop.call_soon_threadsafe(self._fan_out, format, frame)
+
+    def _fan_out(self, format: str, frame: bytes):
+        for queue, formats in self._subscribers.items():
+            if format not in formats:
+                continue
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(frame)
+
+    def resource_changed(self, keys: list[str], subtree: bool):
+        """ストアの変更を ResourceEvent として配信する（store.listeners に登録する）"""
+        message = "ResourceRemoved" if subtree else "ResourceChanged"
+        timestamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.publish("Event", {"Events": [{
+            "EventType": "Other",
+            "EventTimestamp": timestamp,
+            "MessageId": f"ResourceEvent.1.0.{message}",
+            "Message": f"The resource has been {'removed' if subtree else 'changed'}.",
+            "OriginOfCondition": {"@odata.id": key},
+        } for key in keys]})
+
+    async def stream(self, formats: set[str]) -> AsyncIterator[bytes]:
+        """購読者 1 人分の SSE フレームを返す（切断されたら購読をやめる）"""
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._subscribers[queue] = formats
+        try:
+            yield b": connected\n\n"
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), KEEP_ALIVE)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+        finally:
+            del self._subscribers[queue]
@@ -0,0 +1,177 @@
+# ---------------------------------------------------------------------------
+# Copyright (c) 2023-2026 Tabito's Works. All rights reserved.
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+# ---------------------------------------------------------------------------
+import re
+import threading
+from collections import OrderedDict
+
+from collection import Page
+from store import Members, ResourceStore, encode, etag, footprint, normalize
+
+MAX_LEVELS = 6                                      # ServiceRoot の ExpandQuery.MaxLevels と合わせる
+LAZY_PAGE_SIZE = 100                                # ページサイズの指定が無くても、遅延生成の Members はこの件数ずつ展開する
+EXPAND = re.compile(r"^([*.~])(?:\(\$levels=(\d+)\))?$")
+
+
+def parse(value: str) -> tuple[str, int]:
+    """$expand の値を (モード, 階層数) に分解する（不正なら ValueError(メッセージID, メッセージ)）"""
+    match = EXPAND.match(value)
+    if match is None:
+        raise ValueError("Base.1.0.QueryParameterValueFormatError", f"The value '{value}' for the query parameter $expand is of a different format than the parameter can accept.")
+    levels = int(match.group(2) or 1)
+    if not 1 <= levels <= MAX_LEVELS:
+        raise ValueError("Base.1.0.QueryParameterOutOfRange", f"The value '{levels}' for the query parameter $levels is out of range 1 to {MAX_LEVELS}.")
+    return match.group(1), levels
+
+
+def is_link(value) -> bool:
+    return isinstance(value, dict) and len(value) == 1 and "@odata.id" in value
+
+
+class Expanded:
+    """展開済みドキュメント（本文と ETag は最初に要求されたときに作る）"""
+
+    __slots__ = ("doc", "body", "etag", "variants", "children", "size", "memo", "owner")
+
+    def __init__(self, doc: dict, children: set[str] = frozenset(), size: int = 0, memo: tuple | None = None):
+        self.doc = doc
+        self.body: bytes | None = None
+        self.etag: str | None = None
+        self.variants: dict[str, bytes] = {}        # エンコーディング → 圧縮済み本文
+        self.children = children                    # 埋め込んだすべての URI（無効化用）
+        self.size = size                            # ドキュメントと本文のメモリ量（メモの上限に使う）
+        self.memo = memo                            # メモのキー
+        self.owner = None                           # 大きくなったときの通知先（メモ化したときだけ）
+
+
+class Expander:
+    """$expand の展開結果を (URI, モード, 階層数, $skip, $top) ごとにメモ化する
+
+    展開済みの部分木は上位の展開からも再利用される。
+    コレクションは埋め込まれたものも含めてページ単位で展開し、そのページのメンバーだけを展開する。
+    リソースが変更されたら、そのリソースと、それを埋め込んでいる展開結果だけを捨てる。
+    メモは大きさ (bytes) で上限を設け、上限の 1/4 を超える展開結果はメモ化しない。
+    """
+
+    def __init__(self, store: ResourceStore, cache_bytes: int = 64 * 1024 * 1024, page_size: int = 0):
+        self.store = store
+        self.cache_bytes = cache_bytes
+        self.page_size = page_size                  # コレクションのページサイズ（0 なら全件）
+        self._memo: OrderedDict[tuple, Expanded] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._generation = 0                        # 無効化のたびに増やす（展開中の変更を検出する）
+        store.listeners.append(self.invalidate)
+
+    def get(self, uri: str, mode: str, levels: int, skip: int | None = None, top: int | None = None) -> Expanded | None:
+        """展開済みレスポンスを返す（リソースが無ければ None。skip/top はコレクションにだけ効く）"""
+        entry = self._entry(normalize(uri), mode, levels, skip, top)
+        if entry is None:
+            return None
+        if entry.body is None:
+            body = encode(entry.doc)
+            with self._lock:
+                if entry.body is None:
+                    entry.etag = etag(body)
+                    entry.body = body
+                    self._grow(entry, len(body))
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._memo.clear()
+            self._size = 0
+
+    def _grow(self, entry: Expanded, size: int):
+        """entry が大きくなった分をメモの大きさに足す（_lock を取って呼ぶこと）"""
+        entry.size += size
+        if entry.memo is not None and self._memo.get(entry.memo) is entry:
+            self._size += size
+            self._evict()
+
+    def _grew(self, entry: Expanded, size: int):
+        """圧縮済み本文が増えた分を数える（compress.variant から呼ばれる）"""
+        with self._lock:
+            self._grow(entry, size)
+
+    def _evict(self):
+        # 上限を超えたら古いものから捨てる
+        while self._size > self.cache_bytes and self._memo:
+            _, evicted = self._memo.popitem(last=False)
+            self._size -= evicted.size
+
+    def invalidate(self, uris, subtree: bool = False):
+        """uris（subtree なら配下も）とそれを埋め込んでいる展開結果を捨てる"""
+        keys = {normalize(uri) for uri in uris}
+        if not keys:
+            return
+        prefixes = tuple(key + "/" for key in keys)
+
+        def stale(memo, entry) -> bool:
+            if memo[0] in keys or not keys.isdisjoint(entry.children):
+                return True
+            # 削除した部分木の中のリソースを（Links などのクロスリンク経由で）埋め込んでいるものも捨てる
+            return subtree and (memo[0].startswith(prefixes) or any(child.startswith(prefixes) for child in entry.children))
+
+        with self._lock:
+            self._generation += 1
+            for memo in [memo for memo, entry in self._memo.items() if stale(memo, entry)]:
+                self._size -= self._memo.pop(memo).size
+
+    def _entry(self, key: str, mode: str, levels: int, skip: int | None = None, top: int | None = None) -> Expanded | None:
+        memo = (key, mode, levels, skip, top)
+        with self._lock:
+            entry = self._memo.get(memo)
+            if entry is not None:
+                self._memo.move_to_end(memo)
+                return entry
+        resource = self.store.resource(key)
+        if resource is None:
+            return None
+        doc = resource.doc
+        if resource.collection:
+            # 遅延生成の Members（フリートの 100 万台など）は全件を展開しない
+            page_size = self.page_size or (LAZY_PAGE_SIZE if isinstance(doc["Members"], Members) else 0)
+            page = Page(resource, key, skip, top, page_size, f"$expand={mode}($levels={levels})" if levels else "")
+            if not page.whole:
+                doc = page.document(page.members[page.start:page.stop])
+        if levels == 0:
+            return Expanded(doc, size=resource.size)
+        generation = self._generation
+        children = set()
+        embedded: dict[int, int] = {}
+        doc = self._expand(doc, mode, levels, False, children, embedded)
+        entry = Expanded(doc, children, footprint(doc, embedded), memo)
+        with self._lock:
+            # 展開中に変更があった結果は古いかもしれないのでメモ化しない
+            if generation != self._generation or entry.size > self.cache_bytes // 4:
+                entry.memo = None
+                return entry
+            if memo not in self._memo:
+                self._memo[memo] = entry
+                self._size += entry.size
+                entry.owner = self._grew
+                self._evict()
+        return entry
+
+    def _expand(self, value, mode: str, levels: int, in_links: bool, children: set[str], embedded: dict[int, int]):
+        """embedded には埋め込んだ展開結果の大きさを id(ドキュメント) ごとに入れる"""
+        if is_link(value):
+            # "." は Links 以外、"~" は Links 内のリンクだけを展開する
+            if mode == "*" or (mode == ".") != in_links:
+                key = normalize(value["@odata.id"])
+                entry = self._entry(key, mode, levels - 1)
+                if entry is not None:
+                    children.add(key)
+                    children.update(entry.children)
+                    embedded[id(entry.doc)] = entry.size
+                    return entry.doc
+            return value
+        if isinstance(value, dict):
+            return {k: self._expand(v, mode, levels, in_links or k == "Links", children, embedded) for k, v in value.items()}
+        if isinstance(value, (list, Members)):
+            return [self._expand(v, mode, levels, in_links, children, embedded) for v in value]
+        return value
@@ -0,0 +1,286 @@
+# ---------------------------------------------------------------------------
+# Copyright (c) 2023-2026 Tabito's Works. All rights reserved.
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+# ---------------------------------------------------------------------------
+import uuid
+
+from store import Members, ResourceStore
+
+SYSTEMS = "/redfish/v1/Systems"
+CHASSIS = "/redfish/v1/Chassis"
+TEMPLATE_SYSTEM = SYSTEMS + "/437XR1138R2"          # テンプレートにするシステム
+TEMPLATE_CHASSIS = CHASSIS + "/1U"
+SYSTEM_ID = "SYS{:06d}"
+CHASSIS_ID = "CH{:06d}"
+MAC_BASE = 0x124400000000                           # NIC の MAC アドレスの基点（下位 8 ビットが NIC 番号）
+MAX_NICS = 0xFF                                     # 下位 8 ビットに収まる NIC 数
+REQUIRED = ("", "/Memory", "/Processors", "/EthernetInterfaces")    # テンプレートのシステムに必要なリソース
+
+
+def rebase(obj, prefixes: list[tuple[str, str]]):
+    """文字列値の URI プレフィックスを置き換えたコピーを返す"""
+    if isinstance(obj, dict):
+        return {k: rebase(v, prefixes) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [rebase(v, prefixes) for v in obj]
+    if isinstance(obj, str):
+        for old, new in prefixes:
+            if obj == old or obj.startswith(old + "/"):
+                return new + obj[len(old):]
+    return obj
+
+
+def rename_sensors(obj, chassis: str, old: str, new: str):
+    """シャーシ配下のセンサー/コントロール名の接頭辞を置き換える（CPU1Temp → CPU2Temp など）"""
+    if isinstance(obj, dict):
+        return {k: rename_sensors(v, chassis, old, new) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [rename_sensors(v, chassis, old, new) for v in obj]
+    if isinstance(obj, str) and obj.startswith(chassis + "/"):
+        head, _, name = obj.rpartition("/")
+        if name.startswith(old):
+            return f"{head}/{new}{name[len(old):]}"
+    return obj
+
+
+def members(uris) -> list[dict]:
+    return [{"@odata.id": uri} for uri in uris]
+
+
+class Fleet:
+    """テンプレートのシステムから多数の Systems/Chassis を決定的に合成する
+
+    リソースは URI を要求されたときに初めて作られ、キャッシュは ResourceStore の LRU に任せる。
+    """
+
+    def __init__(self, templates: ResourceStore, systems: int, dimms: int = 4, processors: int = 2, nics: int = 2, secureboot_dbs: int = 8):
+        self.systems = systems
+        self.dimms = dimms
+        self.processors = processors
+        self.nics = nics
+        self.secureboot_dbs = secureboot_dbs
+        # テンプレートは起動時に一度だけ取り出しておく
+        self._templates: dict[str, dict] = {}
+        for key, doc in templates.walk(TEMPLATE_SYSTEM):
+            self._templates[key[len(TEMPLATE_SYSTEM):]] = doc
+        db_collection = self._templates.get("/SecureBoot/SecureBootDatabases", {})
+        self._db_names = [m["@odata.id"].rsplit("/", 1)[1] for m in db_collection.get("Members", [])]
+        self._check()
+
+    def _check(self):
+        """合成に使うテンプレートと個数を検証する（一覧に載せたメンバーが 500 にならないよう、起動時に ValueError にする）"""
+        if not 1 <= self.nics <= MAX_NICS:
+            raise ValueError(f"The number of NICs per system must be between 1 and {MAX_NICS}, not {self.nics}.")
+        required = list(REQUIRED)
+        if self.dimms:
+            required.append("/Memory/DIMM1")
+        if self.processors:
+            required.append("/Processors/CPU1")
+        if "/EthernetInterfaces" in self._templates:
+            required.append(self._nic_template())
+        if "/SecureBoot/SecureBootDatabases" in self._templates and self.secureboot_dbs > len(self._db_names):
+            required.append("/SecureBoot/SecureBootDatabases/db")
+        missing = [TEMPLATE_SYSTEM + name for name in required if name not in self._templates]
+        if missing:
+            raise ValueError(f"The mockup has no template for the fleet: {', '.join(missing)}.")
+
+    def attach(self, store: ResourceStore):
+        store.mount(SYSTEMS, self.generate)
+        store.mount(CHASSIS, self.generate)
+
+    # -- ID の割り当て ------------------------------------------------------
+
+    @staticmethod
+    def system_id(index: int) -> str:
+        return SYSTEM_ID.format(index)
+
+    @staticmethod
+    def chassis_id(index: int) -> str:
+        return CHASSIS_ID.format(index)
+
+    def _index(self, id: str, prefix: str, format) -> int | None:
+        number = id[len(prefix):]
+        if not id.startswith(prefix) or not (number.isascii() and number.isdigit()):
+            return None
+        index = int(number)
+        if not 1 <= index <= self.systems or format(index) != id:
+            return None
+        return index
+
+    def system_index(self, id: str) -> int | None:
+        """システム ID から 1 始まりの番号を返す（フリートに無ければ None）"""
+        return self._index(id, "SYS", self.system_id)
+
+    def template(self, name: str) -> dict | None:
+        """テンプレートのドキュメント（name はテンプレートのシステムからの相対パス）"""
+        return self._templates.get(name)
+
+    def nic_id(self, index: int, k: int) -> str:
+        return f"{MAC_BASE + (index << 8) + k:012X}"
+
+    def _nic_template(self) -> str:
+        """テンプレートの NIC の相対パス"""
+        collection = self._templates.get("/EthernetInterfaces") or {}
+        uri = (collection.get("Members") or [{}])[0].get("@odata.id", "")
+        return uri[len(TEMPLATE_SYSTEM):] if uri.startswith(TEMPLATE_SYSTEM + "/") else "/EthernetInterfaces/<member>"
+
+    def db_name(self, k: int) -> str:
+        return self._db_names[k - 1] if k <= len(self._db_names) else f"db{k}"
+
+    # -- 生成 ---------------------------------------------------------------
+
+    def generate(self, uri: str) -> dict | None:
+        parts = uri.split("/")[3:]          # ["Systems", id, ...]
+        if parts == ["Systems"]:
+            return self._systems()
+        if parts == ["Chassis"]:
+            return self._chassis_collection()
+        if parts[0] == "Systems":
+            index = self.system_index(parts[1])
+            return None if index is None else self._system(index, parts[2:])
+        if parts[0] == "Chassis" and len(parts) == 2:
+            index = self._index(parts[1], "CH", self.chassis_id)
+            return None if index is None else self._chassis(index)
+        return None
+
+    def _systems(self) -> dict:
+        doc = {"@odata.type": "#ComputerSystemCollection.ComputerSystemCollection", "Name": "Computer System Collection", "Members@odata.count": 0, "Members": [], "@odata.id": SYSTEMS}
+        return self._collection(doc, Members(self.systems, f"{SYSTEMS}/{SYSTEM_ID}"))
+
+    def _chassis_collection(self) -> dict:
+        doc = {"@odata.type": "#ChassisCollection.ChassisCollection", "Name": "Chassis Collection", "Members@odata.count": 0, "Members": [], "@odata.id": CHASSIS}
+        return self._collection(doc, Members(self.systems, f"{CHASSIS}/{CHASSIS_ID}"))
+
+    def _chassis(self, index: int) -> dict:
+        uri = f"{CHASSIS}/{self.chassis_id(index)}"
+        return {"@odata.type": "#Chassis.v1_21_0.Chassis", "Id": self.chassis_id(index), "Name": "Computer System Chassis", "ChassisType": "RackMount", "Manufacturer": "Contoso", "Model": "3500RX", "SerialNumber": self.chassis_id(index), "UUID": str(uuid.uuid5(uuid.NAMESPACE_URL, uri)), "PowerState": "On", "Status": {"State": "Enabled", "Health": "OK"}, "Links": {"ComputerSystems": [{"@odata.id": f"{SYSTEMS}/{self.system_id(index)}"}], "ManagedBy": [{"@odata.id": "/redfish/v1/Managers/BMC"}]}, "@odata.id": uri}
+
+    def _system(self, index: int, rest: list[str]) -> dict | None:
+        system = f"{SYSTEMS}/{self.system_id(index)}"
+        chassis = f"{CHASSIS}/{self.chassis_id(index)}"
+        path = "/".join(rest)
+        base = [(TEMPLATE_SYSTEM, system), (TEMPLATE_CHASSIS, chassis)]
+
+        def template(name: str, extra: list[tuple[str, str]] = ()) -> dict | None:
+            doc = self._templates.get(name)
+            return None if doc is None else rebase(doc, [*extra, *base])
+
+        if not rest:
+            doc = template("")
+            doc["Id"] = doc["SerialNumber"] = self.system_id(index)
+            doc["Name"] = doc["HostName"] = f"web{index}"
+            doc["UUID"] = str(uuid.uuid5(uuid.NAMESPACE_URL, system))
+            doc["ProcessorSummary"]["Count"] = self.processors
+            dimm = self._templates.get("/Memory/DIMM1", {})
+            doc["MemorySummary"]["TotalSystemMemoryGiB"] = self.dimms * dimm.get("CapacityMiB", 32768) // 1024
+            return doc
+        if path == "Memory":
+            return self._collection(template("/Memory"), (f"{system}/Memory/DIMM{k}" for k in range(1, self.dimms + 1)))
+        if path == "Processors":
+            uris = [f"{system}/Processors/CPU{k}" for k in range(1, self.processors + 1)]
+            if "/Processors/FPGA1" in self._templates:
+                uris.append(f"{system}/Processors/FPGA1")
+            return self._collection(template("/Processors"), uris)
+        if path == "EthernetInterfaces":
+            return self._collection(template("/EthernetInterfaces"), (f"{system}/EthernetInterfaces/{self.nic_id(index, k)}" for k in range(1, self.nics + 1)))
+        if path == "SecureBoot/SecureBootDatabases":
+            return self._collection(template("/SecureBoot/SecureBootDatabases"), (f"{system}/SecureBoot/SecureBootDatabases/{self.db_name(k)}" for k in range(1, self.secureboot_dbs + 1)))
+
+        # 個数が可変なメンバー
+        if rest[0] == "Memory" and len(rest) in (2, 3) and rest[1].startswith("DIMM"):
+            k = self._ordinal(rest[1], "DIMM", self.dimms)
+            if k is None:
+                return None
+            doc = template("/Memory/DIMM1" + ("/" + rest[2] if len(rest) == 3 else ""), [(f"{TEMPLATE_SYSTEM}/Memory/DIMM1", f"{system}/Memory/DIMM{k}")])
+            if doc is None:
+                return None
+            doc = rename_sensors(doc, chassis, "DIMM1", f"DIMM{k}")
+            if len(rest) == 3:
+                return doc
+            sockets = max(self.processors, 1)
+            per_socket = -(-self.dimms // sockets)
+            doc["Id"] = f"DIMM{k}"
+            doc["Name"] = f"DIMM Slot {k}"
+            doc["MemoryLocation"] = {"Socket": (k - 1) // per_socket + 1, "MemoryController": (k - 1) // per_socket + 1, "Channel": (k - 1) % per_socket + 1, "Slot": k}
+            return doc
+        if rest[0] == "Processors" and len(rest) in (2, 3) and rest[1].startswith("CPU"):
+            k = self._ordinal(rest[1], "CPU", self.processors)
+            if k is None:
+                return None
+            cpu = f"{system}/Processors/CPU{k}"
+            doc = template("/Processors/CPU1" + ("/" + rest[2] if len(rest) == 3 else ""), [(f"{TEMPLATE_SYSTEM}/Processors/CPU1", cpu)])
+            if doc is None:
+                return None
+            doc = rename_sensors(doc, chassis, "CPU1", f"CPU{k}")
+            if len(rest) == 2:
+                doc["Id"] = f"CPU{k}"
+                doc["Socket"] = f"CPU {k}"
+            return doc
+        if rest[0] == "EthernetInterfaces" and len(rest) == 2:
+            k = self._nic_ordinal(index, rest[1])
+            if k is None:
+                return None
+            template_nic = self._nic_template()
+            doc = template(template_nic, [(TEMPLATE_SYSTEM + template_nic, f"{system}/EthernetInterfaces/{rest[1]}")])
+            if doc is None:
+                return None
+            mac = ":".join(rest[1][i:i + 2] for i in range(0, 12, 2))
+            doc["Id"] = rest[1]
+            doc["Description"] = f"System NIC {k}"
+            doc["PermanentMACAddress"] = doc["MACAddress"] = mac
+            doc["HostName"] = f"web{index}"
+            doc["FQDN"] = f"web{index}.contoso.com"
+            return doc
+        if rest[:2] == ["SecureBoot", "SecureBootDatabases"] and len(rest) == 3:
+            k = self._db_ordinal(rest[2])
+            if k is None:
+                return None
+            if k <= len(self._db_names):
+                return template(f"/SecureBoot/SecureBootDatabases/{rest[2]}")
+            doc = template("/SecureBoot/SecureBootDatabases/db", [(f"{TEMPLATE_SYSTEM}/SecureBoot/SecureBootDatabases/db", f"{system}/SecureBoot/SecureBootDatabases/{rest[2]}")])
+            if doc is not None:
+                doc["Id"] = doc["DatabaseId"] = rest[2]
+                doc["Name"] = f"{rest[2]} - Authorized Signature Database"
+                doc["Description"] = f"UEFI {rest[2]} Secure Boot Database"
+            return doc
+        if rest[0] in ("Memory", "Processors", "EthernetInterfaces") and len(rest) > 1 and not (rest[0] == "Processors" and rest[1] == "FPGA1"):
+            return None                     # テンプレート側にしかないメンバーは見せない
+        # 個数が固定のもの（Bios, SecureBoot, FPGA1 など）はテンプレートをそのまま使う
+        return template("/" + path)
+
+    @staticmethod
+    def _collection(doc: dict | None, uris) -> dict | None:
+        if doc is None:
+            return None
+        doc["Members"] = uris if isinstance(uris, Members) else members(uris)
+        doc["Members@odata.count"] = len(doc["Members"])
+        return doc
+
+    @staticmethod
+    def _ordinal(id: str, prefix: str, count: int) -> int | None:
+        number = id[len(prefix):]
+        if not (number.isascii() and number.isdigit()) or str(int(number)) != number:
+            return None
+        k = int(number)
+        return k if 1 <= k <= count else None
+
+    def _nic_ordinal(self, index: int, id: str) -> int | None:
+        try:
+            value = int(id, 16) - MAC_BASE
+        except ValueError:
+            return None
+        k = value & 0xFF
+        if len(id) != 12 or value >> 8 != index or not 1 <= k <= self.nics or self.nic_id(index, k) != id:
+            return None
+        return k
+
+    def _db_ordinal(self, name: str) -> int | None:
+        if name in self._db_names:
+            k = self._db_names.index(name) + 1
+        else:
+            k = self._ordinal(name, "db", self.secureboot_dbs)
+            if k is not None and k <= len(self._db_names):
+                return None
+        return k if k is not None and k <= self.secureboot_dbs else None
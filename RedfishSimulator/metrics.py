@@ -0,0 +1,163 @@
+# ---------------------------------------------------------------------------
+# Copyright (c) 2023-2026 Tabito's Works. All rights reserved.
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+# ---------------------------------------------------------------------------
+import bisect
+import re
+import time
+from urllib.parse import parse_qs
+
+from store import encode, normalize
+
+PATH = "/metrics"
+# レイテンシのヒストグラムの境界 (ms)
+BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# URI の中の番号をまとめる（フリートの 100 万台が別々の集計にならないように）
+ORDINALS = (
+    (re.compile(r"^(?:SYS|CH)\d+$"), "{id}"),       # フリートのシステム/シャーシ
+    (re.compile(r"(DIMM|CPU)\d+"), r"\1{n}"),       # スロット（センサー名の DIMM3Temp なども）
+    (re.compile(r"^[0-9A-F]{12}$"), "{nic}"),       # NIC（MAC アドレス）
+    (re.compile(r"^db\d+$"), "db{n}"),              # セキュアブートのデータベース
+    (re.compile(r"^\d+$"), "{n}"),                  # POST で作った連番
+)
+MAX_ROUTES = 1000                                   # これを超えた分は (other) にまとめる
+
+
+class Route:
+    """ルートごとの集計"""
+
+    __slots__ = ("hits", "timed", "statuses", "bytes", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.hits = 0
+        self.timed = 0                              # レイテンシを数えたもの（開いたままのストリームは除く）
+        self.statuses: dict[int, int] = {}
+        self.bytes = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)     # 最後は BUCKETS を超えたもの
+
+    def add(self, status: int, size: int, ms: float | None):
+        """ms が None ならレイテンシには数えない"""
+        self.hits += 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.bytes += size
+        if ms is None:
+            return
+        self.timed += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.buckets[bisect.bisect_left(BUCKETS, ms)] += 1
+
+    def percentile(self, p: float) -> float:
+        """p パーセンタイルを含むバケットの上限 (ms)"""
+        if not self.timed:
+            return 0
+        rank = p / 100 * self.timed
+        seen = 0
+        for bound, count in zip(BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max_ms
+
+    def summary(self) -> dict:
+        return {
+            "hits": self.hits,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "bytes": self.bytes,
+            "mean_ms": round(self.total_ms / self.timed, 3) if self.timed else 0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max_ms, 3),
+            "histogram": {**{str(bound): count for bound, count in zip(BUCKETS, self.buckets)}, "+Inf": self.buckets[-1]},
+        }
+
+
+def resource_name(path: str) -> str:
+    """URI の番号を ORDINALS でまとめたもの（/redfish/v1/Systems/SYS000123 → /redfish/v1/Systems/{id}）"""
+    segments = normalize(path).split("/")
+    for i, segment in enumerate(segments):
+        for pattern, replacement in ORDINALS:
+            segment = pattern.sub(replacement, segment)
+        segments[i] = segment
+    return "/".join(segments)
+
+
+def route_name(scope: dict) -> str:
+    """集計の単位（メソッドと番号をまとめたリソースの URI。$expand と $top/$skip は別に数える）"""
+    name = f"{scope['method']} {resource_name(scope['path'])}"
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    if "$expand" in query:
+        name += " $expand"
+    elif "$top" in query or "$skip" in query:
+        name += " $top/$skip"
+    return name
+
+
+class Metrics:
+    """ルートごとのヒット数・ステータス・転送量・レイテンシのヒストグラムを集める ASGI ミドルウェア
+
+    GET /metrics で集計を JSON で返し、DELETE /metrics で集計を消す（それ以外のメソッドは 405）。集計はワーカーごと。
+    SSE のように開いたままのストリームは、ヒット数と転送量だけを数えてレイテンシには含めない。
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.routes: dict[str, Route] = {}
+        self.started = time.time()
+
+    def summary(self) -> dict:
+        routes = sorted(self.routes.items(), key=lambda item: -item[1].hits)
+        return {"uptime_s": round(time.time() - self.started, 3), "routes": {name: route.summary() for name, route in routes}}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if scope["path"] == PATH:
+            await self._endpoint(scope, send)
+            return
+        start = time.perf_counter()
+        status = 500
+        size = 0
+        stream = False
+
+        async def measure(message):
+            nonlocal status, size, stream
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                # SSE は切断されるまで開いたままなので、その時間はレイテンシではない
+                stream = any(name.lower() == b"content-type" and value.startswith(b"text/event-stream") for name, value in message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, measure)
+        finally:
+            name = route_name(scope)
+            route = self.routes.get(name)
+            if route is None and len(self.routes) >= MAX_ROUTES:
+                name = f"{scope['method']} (other)"
+                route = self.routes.get(name)
+            if route is None:
+                route = self.routes[name] = Route()
+            route.add(status, size, None if stream else (time.perf_counter() - start) * 1000)
+
+    async def _endpoint(self, scope, send):
+        headers = [(b"content-type", b"application/json")]
+        if scope["method"] == "DELETE":
+            self.routes.clear()
+            self.started = time.time()
+            status, body = 204, b""
+        elif scope["method"] == "GET":
+            status, body = 200, encode(self.summary())
+        else:
+            status, body = 405, b""
+            headers.append((b"allow", b"GET, DELETE"))
+        await send({"type": "http.response.start", "status": status, "headers": [*headers, (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,154 @@
+# ---------------------------------------------------------------------------
+# Copyright (c) 2023-2026 Tabito's Works. All rights reserved.
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+# ---------------------------------------------------------------------------
+"""リソースツリーのスナップショット
+
+エンコード済みの全ドキュメントと URI の索引を 1 つのファイルにまとめ、各ワーカーは読み取り専用で mmap する。
+
+    ヘッダー  : MAGIC, 件数, 索引の位置
+    本文/キー : 各ドキュメントの URI・本文・圧縮済み本文 (gzip, br) を順に並べたもの
+    索引      : (URI のハッシュ, 各位置, 各長さ, ETag, フラグ) をハッシュ順に並べたもの
+
+Members を遅延生成するコレクションは、本文の代わりに Members を除いたドキュメントと件数・pattern を入れ、
+読み出すときに Members を遅延生成に戻す（全件をエンコード・解析しない）。
+
+圧縮済み本文も含めて全ワーカーがページキャッシュを共有するので、ワーカーごとのキャッシュには入れない。
+
+使い方（環境変数は main と同じものを使う）:
+
+    $ python snapshot.py tree.snap
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from collections import deque
+
+import compress
+from store import Members, Resource, ResourceStore, encode, normalize
+
+MAGIC = b"RFSNAP02"
+HEADER = struct.Struct("<8sQQ")                     # MAGIC, 件数, 索引の位置
+ENTRY = struct.Struct("<QQQQQIIII8sB7x")            # ハッシュ, (キー, 本文, gzip, br) の位置, 同じ順の長さ, ETag, フラグ
+COLLECTION = 0x01                                   # フラグ: コレクション
+LAZY = 0x02                                         # フラグ: Members を件数と pattern で持つ（本文はその記述）
+
+
+def key_hash(key: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def links(value):
+    """ドキュメント内の @odata.id をすべて列挙する"""
+    if isinstance(value, dict):
+        for k, v in value.items():
+            if k == "@odata.id" and isinstance(v, str):
+                yield v
+            else:
+                yield from links(v)
+    elif isinstance(value, (list, Members)):
+        for v in value:
+            yield from links(v)
+
+
+def crawl(store: ResourceStore, root: str = "/redfish/v1"):
+    """静的リソースとリンクをたどって到達できる生成リソースを (URI, Resource) で列挙する"""
+    seen = set()
+    queue = deque([root, *(key for key, _ in store.walk(root))])
+    while queue:
+        key = normalize(queue.popleft())
+        if key in seen:
+            continue
+        seen.add(key)
+        resource = store.resource(key)
+        if resource is None:
+            continue
+        yield key, resource
+        queue.extend(links(resource.doc))
+
+
+def build(store: ResourceStore, path: str, compress_min: int = 512) -> int:
+    """スナップショットを書き出す（一時ファイルに書いてから置き換える。compress_min 以上の本文は圧縮済み本文も入れる）"""
+    entries = []
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, 0, 0))
+        for key, resource in crawl(store):
+            body = resource.body
+            flags = COLLECTION if resource.collection else 0
+            members = resource.doc.get("Members")
+            if isinstance(members, Members):
+                flags |= LAZY
+                body = encode({"doc": {**resource.doc, "Members": []}, "count": members.count, "pattern": members.pattern, "start": members.start})
+            parts = [key.encode("utf-8"), body]
+            for encoding in ("gzip", "br"):
+                compressed = encoding in compress.ENCODINGS and len(body) >= compress_min and not flags & LAZY
+                parts.append(compress.compress(body, encoding) if compressed else b"")
+            offsets = []
+            for part in parts:
+                offsets.append(f.tell())
+                f.write(part)
+            entries.append((key_hash(parts[0]), *offsets, *map(len, parts), bytes.fromhex(resource.etag.strip('"')), flags))
+        entries.sort()
+        index = f.tell()
+        for entry in entries:
+            f.write(ENTRY.pack(*entry))
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, len(entries), index))
+    os.replace(temp, path)
+    return len(entries)
+
+
+class Snapshot:
+    """mmap したスナップショットから Resource を引く（本文は mmap の memoryview）"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        magic, self.count, self._index = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a snapshot.")
+
+    def attach(self, store: ResourceStore, prefix: str = "/redfish/v1"):
+        # 本文はページキャッシュを全ワーカーで共有するので LRU には入れない（索引の検索は O(log n)）
+        store.mount(prefix, self.resource, cache=False)
+
+    def resource(self, uri: str) -> Resource | None:
+        name = normalize(uri).encode("utf-8")
+        h = key_hash(name)
+        # ハッシュで二分探索してから衝突を考慮してキーを比べる
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if struct.unpack_from("<Q", self._map, self._index + mid * ENTRY.size)[0] < h:
+                lo = mid + 1
+            else:
+                hi = mid
+        while lo < self.count:
+            eh, *fields, tag, flags = ENTRY.unpack_from(self._map, self._index + lo * ENTRY.size)
+            if eh != h:
+                break
+            # コピーせずに mmap の領域をそのまま返す
+            name_part, body, gzip, br = (self._view[offset:offset + length] for offset, length in zip(fields[:4], fields[4:]))
+            if name_part == name and flags & LAZY:
+                spec = json.loads(bytes(body))
+                return Resource({**spec["doc"], "Members": Members(spec["count"], spec["pattern"], spec["start"])})
+            if name_part == name:
+                resource = Resource.encoded(body, '"' + tag.hex() + '"', bool(flags & COLLECTION))
+                resource.variants.update((encoding, part) for encoding, part in (("gzip", gzip), ("br", br)) if len(part))
+                return resource
+            lo += 1
+        return None
+
+
+if __name__ == "__main__":
+    os.environ.pop("REDFISH_SNAPSHOT", None)
+    import main
+    count = build(main.store, sys.argv[1], main.COMPRESS_MIN)
+    print(f"{count} resources written to {sys.argv[1]}")
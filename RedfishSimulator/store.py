@@ -0,0 +1,380 @@
+# ---------------------------------------------------------------------------
+# Copyright (c) 2023-2026 Tabito's Works. All rights reserved.
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+# ---------------------------------------------------------------------------
+import bisect
+import functools
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Callable
+
+
+class RedfishError(Exception):
+    """Redfish のエラーレスポンスとして返す例外"""
+
+    def __init__(self, status_code: int, code: str, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.code = code
+        self.message = message
+
+
+def normalize(uri: str) -> str:
+    """URI を索引キーへ正規化する（クエリ・フラグメント・末尾スラッシュを除去）"""
+    uri = uri.split("?", 1)[0].split("#", 1)[0]
+    return uri.rstrip("/") or "/"
+
+
+class Members(Sequence):
+    """要素を必要になったときに作る Members（巨大コレクション用）
+
+    i 番目（0 始まり）の @odata.id は pattern.format(i + start) なので、件数と pattern だけで表せる。
+    """
+
+    def __init__(self, count: int, pattern: str, start: int = 1):
+        self.count = count
+        self.pattern = pattern
+        self.start = start
+
+    def _uri(self, i: int) -> str:
+        return self.pattern.format(i + self.start)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [{"@odata.id": self._uri(i)} for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return {"@odata.id": self._uri(index)}
+
+    def encoded(self, start: int, stop: int) -> bytes:
+        """start から stop までの要素をカンマ区切りでエンコードする"""
+        return ",".join('{"@odata.id":' + json.dumps(self._uri(i), ensure_ascii=False) + "}" for i in range(start, stop)).encode("utf-8")
+
+    def signature(self) -> bytes:
+        """ETag 用の要約（要素は番号から決定的に作られるので件数と両端で十分）"""
+        return encode([self.count, self[0] if self.count else None, self[-1] if self.count else None])
+
+    def position(self, uri: str) -> int | None:
+        """@odata.id から位置を逆算する（含まれなければ None）"""
+        prefix, _, rest = self.pattern.partition("{")
+        suffix = rest.partition("}")[2]
+        number = uri[len(prefix):len(uri) - len(suffix)]
+        if not (uri.startswith(prefix) and uri.endswith(suffix) and number.isascii() and number.isdigit()):
+            return None
+        i = int(number) - self.start
+        return i if 0 <= i < self.count and self._uri(i) == uri else None
+
+    def without(self, uri: str) -> "Members":
+        """uri を除いた Members（全件を作らずに除いた位置だけを覚える）"""
+        return EditedMembers(self).without(uri)
+
+    def plus(self, uri: str) -> "Members":
+        """末尾に uri を加えた Members"""
+        return EditedMembers(self).plus(uri)
+
+
+class EditedMembers(Members):
+    """POST / DELETE を重ねた遅延生成の Members（元の Members と、除いた位置・末尾に加えた URI だけを持つ）"""
+
+    def __init__(self, base: Members, removed: list[int] | None = None, added: list[str] | None = None):
+        self.base = base
+        self.removed = removed or []                # 除いた元の位置（昇順）
+        self.added = added or []
+        super().__init__(base.count - len(self.removed) + len(self.added), base.pattern, base.start)
+
+    def _uri(self, i: int) -> str:
+        kept = self.base.count - len(self.removed)
+        if i >= kept:
+            return self.added[i - kept]
+        # i 番目に残っている元の位置（その位置までに除いた数だけ後ろへずらす）
+        position = i
+        while True:
+            shifted = i + bisect.bisect_right(self.removed, position)
+            if shifted == position:
+                return self.base._uri(position)
+            position = shifted
+
+    def signature(self) -> bytes:
+        return encode([self.base.signature().decode("utf-8"), self.removed, self.added])
+
+    def position(self, uri: str) -> int | None:
+        if uri in self.added:
+            return self.base.count - len(self.removed) + self.added.index(uri)
+        position = self.base.position(uri)
+        if position is None or self._removed(position):
+            return None
+        return position - bisect.bisect_left(self.removed, position)
+
+    def _removed(self, position: int) -> bool:
+        i = bisect.bisect_left(self.removed, position)
+        return i < len(self.removed) and self.removed[i] == position
+
+    def without(self, uri: str) -> Members:
+        if uri in self.added:
+            return EditedMembers(self.base, self.removed, [added for added in self.added if added != uri])
+        position = self.base.position(uri)
+        if position is None or self._removed(position):
+            return self
+        removed = list(self.removed)
+        bisect.insort(removed, position)
+        return EditedMembers(self.base, removed, self.added)
+
+    def plus(self, uri: str) -> Members:
+        return EditedMembers(self.base, self.removed, self.added + [uri])
+
+
+_MISSING = object()                                 # _writes に無いことを表す（None は削除済み）
+
+
+def _default(value):
+    if isinstance(value, Members):
+        return value[:]
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode(doc) -> bytes:
+    """FastAPI の JSONResponse と同じ書式でシリアライズする"""
+    return json.dumps(doc, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def footprint(value, known: dict[int, int] | None = None) -> int:
+    """ドキュメントが占めるおおよそのメモリ量 (bytes)（known は id → 計算済みの大きさ）"""
+    if known and id(value) in known:
+        return known[id(value)]
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += sys.getsizeof(k) + footprint(v, known)
+    elif isinstance(value, list):
+        for v in value:
+            size += footprint(v, known)
+    return size
+
+
+def etag(body: bytes) -> str:
+    """内容から強い ETag を作る"""
+    return '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+
+def etag_matches(header: str | None, tag: str, weak: bool = True) -> bool:
+    """If-None-Match（弱い比較）/ If-Match（強い比較）の判定"""
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if weak and candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == tag:
+            return True
+    return False
+
+
+class Resource:
+    """ドキュメントとエンコード済みレスポンス・ETag の組
+
+    ETag は @odata.etag を除いた内容から一度だけ計算し、@odata.etag として末尾に埋め込む。
+    Members が遅延生成（Members クラス）の場合は本文を持たず、応答時に分割して組み立てる。
+    size は本文・ドキュメント・圧縮済み本文を合わせたメモリ量（キャッシュの上限に使う）。
+    """
+
+    __slots__ = ("_doc", "body", "etag", "size", "variants", "collection", "owner")
+
+    def __init__(self, doc: dict):
+        self.variants: dict[str, bytes] = {}        # エンコーディング → 圧縮済み本文（compress.variant が作る）
+        self.owner: Callable[["Resource", int], None] | None = None    # 大きくなったときの通知先（保持しているキャッシュ）
+        doc = {k: v for k, v in doc.items() if k != "@odata.etag"}
+        members = doc.get("Members")
+        self.collection = isinstance(members, (list, Members))
+        if isinstance(members, Members):
+            body = encode({**doc, "Members": []})
+            self.etag = etag(body + members.signature())
+            self.body = None
+        else:
+            body = encode(doc)
+            self.etag = etag(body)
+            # 再エンコードせずに末尾へ継ぎ足す
+            self.body = body[:-1] + (b"," if doc else b"") + b'"@odata.etag":' + json.dumps(self.etag).encode("utf-8") + b"}"
+        doc["@odata.etag"] = self.etag
+        self._doc = doc
+        self.size = len(self.body if self.body is not None else body) + footprint(doc)
+
+    @classmethod
+    def encoded(cls, body: bytes | memoryview, etag: str, collection: bool) -> "Resource":
+        """エンコード済みの本文から作る（ドキュメントは必要になったときに復元する。本文は mmap の memoryview でもよい）"""
+        resource = cls.__new__(cls)
+        resource._doc = None
+        resource.body = body
+        resource.etag = etag
+        resource.size = len(body)
+        resource.variants = {}
+        resource.collection = collection
+        resource.owner = None
+        return resource
+
+    @property
+    def doc(self) -> dict:
+        if self._doc is None:
+            self._doc = json.loads(bytes(self.body))
+        return self._doc
+
+
+class ResourceStore:
+    """@odata.id をキーに JSON ドキュメントとエンコード済みバイト列を保持する"""
+
+    def __init__(self, cache_bytes: int = 64 * 1024 * 1024):
+        self._resources: dict[str, Resource] = {}                               # URI → 静的リソース
+        self._mounts: list[tuple[str, Callable[[str], dict | Resource | None], bool]] = []  # (プレフィックス, 生成関数, キャッシュするか)
+        self._cache: OrderedDict[str, Resource] = OrderedDict()                 # 生成リソースの LRU
+        self._cache_size = 0
+        self._cache_lock = threading.Lock()
+        self._writes: dict[str, Resource | None] = {}                           # 書き込み結果（None は削除済み）
+        self._deleted: set[str] = set()                                         # 削除した URI（配下も見せない）
+        self.cache_bytes = cache_bytes
+        self.lock = threading.RLock()                                           # 書き込みの直列化
+        self.listeners: list[Callable[[list[str], bool], None]] = []            # 変更の通知先 (URI の一覧, 配下も含むか)
+        self.filters: list[Callable[[str, Resource], Resource]] = []            # 返す直前に差し替える（テレメトリなど）
+
+    @classmethod
+    def load(cls, root: str, **kwargs) -> "ResourceStore":
+        """モックアップのディレクトリツリー（DMTF 形式）を読み込む"""
+        store = cls(**kwargs)
+        for dirpath, _, filenames in os.walk(root):
+            for filename in sorted(filenames):
+                if not filename.endswith(".json"):
+                    continue
+                with open(os.path.join(dirpath, filename), encoding="utf-8") as f:
+                    doc = json.load(f)
+                # @odata.id が無ければディレクトリ位置から URI を決める
+                uri = doc.get("@odata.id") if isinstance(doc, dict) else None
+                if uri is None:
+                    uri = "/" + os.path.relpath(dirpath, root).replace(os.sep, "/")
+                store.put(uri, doc)
+        return store
+
+    def put(self, uri: str, doc: dict):
+        self._resources[normalize(uri)] = Resource(doc)
+
+    def walk(self, prefix: str):
+        """プレフィックス配下の静的リソースを (URI, ドキュメント) で列挙する"""
+        prefix = normalize(prefix)
+        for key, resource in self._resources.items():
+            if key == prefix or key.startswith(prefix + "/"):
+                yield key, resource.doc
+
+    def mount(self, prefix: str, generator: Callable[[str], dict | Resource | None], cache: bool = True):
+        """プレフィックス配下を生成関数で置き換える（静的リソースより優先。cache=False なら LRU に入れない）"""
+        self._mounts.append((normalize(prefix), generator, cache))
+
+    def resource(self, uri: str) -> Resource | None:
+        key = normalize(uri)
+        resource = self._lookup(key)
+        if resource is not None:
+            for f in self.filters:
+                resource = f(key, resource)
+        return resource
+
+    def _lookup(self, key: str) -> Resource | None:
+        # 書き込まれたものは元のツリーより優先する（元のツリーは変更しない）
+        if self._writes:
+            # 別スレッドの DELETE が配下を消すことがあるので、in と [] に分けずに 1 回で引く
+            written = self._writes.get(key, _MISSING)
+            if written is not _MISSING:
+                return written
+            if self._deleted and self._under_deleted(key):
+                return None
+        for prefix, generator, cache in self._mounts:
+            if key == prefix or key.startswith(prefix + "/"):
+                if cache:
+                    return self._generate(key, generator)
+                doc = generator(key)
+                return doc if doc is None or isinstance(doc, Resource) else Resource(doc)
+        return self._resources.get(key)
+
+    def _under_deleted(self, key: str) -> bool:
+        while "/" in key:
+            key = key[:key.rfind("/")]
+            if key in self._deleted:
+                return True
+        return False
+
+    def _generate(self, key: str, generator: Callable[[str], dict | Resource | None]) -> Resource | None:
+        with self._cache_lock:
+            resource = self._cache.get(key)
+            if resource is not None:
+                self._cache.move_to_end(key)
+                return resource
+        doc = generator(key)
+        if doc is None:
+            return None
+        resource = doc if isinstance(doc, Resource) else Resource(doc)
+        with self._cache_lock:
+            if key not in self._cache:
+                self._cache[key] = resource
+                self._cache_size += resource.size
+                resource.owner = functools.partial(self._grow, key)
+            self._evict()
+        return resource
+
+    def _grow(self, key: str, resource: Resource, size: int):
+        """キャッシュ中のリソースに圧縮済み本文が増えた分を数える"""
+        with self._cache_lock:
+            resource.size += size
+            if self._cache.get(key) is resource:
+                self._cache_size += size
+                self._evict()
+
+    def _evict(self):
+        # 上限を超えたら古いものから捨てる（_cache_lock を取って呼ぶこと）
+        while self._cache_size > self.cache_bytes and len(self._cache) > 1:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_size -= evicted.size
+
+    def replace(self, uri: str, doc: dict) -> Resource:
+        """リソースを新しいドキュメントで置き換える（呼び出し側で lock を取ること）"""
+        key = normalize(uri)
+        resource = Resource(doc)
+        self._changed(key, resource)
+        return resource
+
+    def delete(self, uri: str):
+        """リソースとその配下を削除する（呼び出し側で lock を取ること）"""
+        self._changed(normalize(uri), None)
+
+    def _changed(self, key: str, resource: Resource | None):
+        if resource is None:
+            self._deleted.add(key)
+            # 配下に書き込んだものも見えなくする
+            for child in [child for child in self._writes if child.startswith(key + "/")]:
+                del self._writes[child]
+        self._writes[key] = resource
+        # 置き換えたものだけを捨てる（本文・ETag・圧縮済み本文は Resource ごと入れ替わる）
+        with self._cache_lock:
+            evicted = self._cache.pop(key, None)
+            if evicted is not None:
+                self._cache_size -= evicted.size
+        for listener in self.listeners:
+            listener([key], resource is None)
+
+    def document(self, uri: str) -> dict | None:
+        resource = self.resource(uri)
+        return resource.doc if resource is not None else None
+
+    def __contains__(self, uri: str) -> bool:
+        return self.resource(uri) is not None
+
+    def __len__(self) -> int:
+        return len(self._resources)
@@ -0,0 +1,236 @@
+# ---------------------------------------------------------------------------
+# Copyright (c) 2023-2026 Tabito's Works. All rights reserved.
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+# ---------------------------------------------------------------------------
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Callable
+
+import numpy as np                                  # pip install numpy
+
+from fleet import SYSTEMS, Fleet
+from store import Resource, ResourceStore
+
+REPORT = "/redfish/v1/TelemetryService/MetricReports/Telemetry"
+METRICS = ("/EnvironmentMetrics", "/ProcessorMetrics")
+CHANNELS = ("TemperatureCelsius", "PowerWatts", "FanSpeedsPercent", "BandwidthPercent")
+PERCENT = [2, 3]                                    # 0〜100 に収めるチャネル
+THETA = 0.2                                         # 基準値へ戻る強さ
+SIGMA = np.array([0.8, 0.05, 3.0, 3.0], np.float32) # ゆらぎ（電力は基準値に対する比率）
+CAUTION = 4.0                                       # 基準温度からこれだけ上がったら警告イベント
+TOP = 10                                            # MetricReport に載せる高温センサー数
+MAX_EVENTS = 100                                    # 1 回の Event に載せる最大件数
+
+logger = logging.getLogger(__name__)
+
+
+def readings(doc: dict) -> tuple[float, float, float, float]:
+    """メトリクスのドキュメントから CHANNELS の順に (温度, 電力, ファン回転数, 帯域使用率) を取り出す（無いものは 0）"""
+    temperature = doc.get("TemperatureCelsius")
+    if isinstance(temperature, dict):
+        temperature = temperature.get("Reading")
+    power = doc.get("PowerWatts", {}).get("Reading") if isinstance(doc.get("PowerWatts"), dict) else doc.get("ConsumedPowerWatt")
+    fan = doc["FanSpeedsPercent"][0].get("Reading") if doc.get("FanSpeedsPercent") else None
+    bandwidth = doc.get("BandwidthPercent")
+    return float(temperature or 0), float(power or 0), float(fan or 0), float(bandwidth or 0)
+
+
+def apply(doc: dict, values) -> dict:
+    """readings() と同じ場所に現在値を書き込んだ新しいドキュメントを返す"""
+    temperature, power, fan, bandwidth = (round(float(v), 2) for v in values)
+    doc = dict(doc)
+    if isinstance(doc.get("TemperatureCelsius"), dict):
+        doc["TemperatureCelsius"] = {**doc["TemperatureCelsius"], "Reading": temperature}
+    elif "TemperatureCelsius" in doc:
+        doc["TemperatureCelsius"] = temperature
+    if isinstance(doc.get("PowerWatts"), dict):
+        doc["PowerWatts"] = {**doc["PowerWatts"], "Reading": power}
+    elif "ConsumedPowerWatt" in doc:
+        doc["ConsumedPowerWatt"] = power
+    if doc.get("FanSpeedsPercent"):
+        doc["FanSpeedsPercent"] = [{**entry, "Reading": fan} for entry in doc["FanSpeedsPercent"]]
+    if "BandwidthPercent" in doc:
+        doc["BandwidthPercent"] = bandwidth
+    return doc
+
+
+class StaticIndex:
+    """モックアップ内のメトリクスリソースとセンサー番号の対応"""
+
+    def __init__(self, mockup: ResourceStore, store: ResourceStore):
+        # 配信中のツリーで見えるものだけを対象にする（フリートで隠れたテンプレートは除く）
+        self._uris = [key for key, doc in mockup.walk("/redfish/v1") if key.endswith(METRICS) and store.resource(key) is not None]
+        self._rows = {uri: row for row, uri in enumerate(self._uris)}
+        self._bases = [readings(mockup.document(uri)) for uri in self._uris]
+        self.count = len(self._uris)
+
+    def row(self, key: str) -> int | None:
+        return self._rows.get(key)
+
+    def uri(self, row: int) -> str:
+        return self._uris[row]
+
+    def bases(self) -> np.ndarray:
+        return np.array(self._bases, np.float32).reshape(self.count, len(CHANNELS))
+
+
+class FleetIndex:
+    """フリートのメトリクスリソースとセンサー番号の対応（番号から計算するので一覧は持たない）"""
+
+    def __init__(self, fleet: Fleet):
+        self.fleet = fleet
+        # システムごとのメトリクス（相対パス, テンプレート）
+        slots = [(f"Memory/DIMM{k}/EnvironmentMetrics", "/Memory/DIMM1/EnvironmentMetrics") for k in range(1, fleet.dimms + 1)]
+        slots += [(f"Processors/CPU{k}/EnvironmentMetrics", "/Processors/CPU1/EnvironmentMetrics") for k in range(1, fleet.processors + 1)]
+        slots += [("Processors/FPGA1/ProcessorMetrics", "/Processors/FPGA1/ProcessorMetrics")]
+        slots = [(path, template) for path, template in slots if fleet.template(template) is not None]
+        self._paths = [path for path, _ in slots]
+        self._slots = {path: slot for slot, path in enumerate(self._paths)}
+        self._bases = [readings(fleet.template(template)) for _, template in slots]
+        self.count = fleet.systems * len(self._paths)
+
+    def row(self, key: str) -> int | None:
+        if not key.startswith(SYSTEMS + "/"):
+            return None
+        id, _, path = key[len(SYSTEMS) + 1:].partition("/")
+        slot = self._slots.get(path)
+        index = self.fleet.system_index(id) if slot is not None else None
+        return None if index is None else (index - 1) * len(self._paths) + slot
+
+    def uri(self, row: int) -> str:
+        index, slot = divmod(row, len(self._paths))
+        return f"{SYSTEMS}/{self.fleet.system_id(index + 1)}/{self._paths[slot]}"
+
+    def bases(self) -> np.ndarray:
+        return np.tile(np.array(self._bases, np.float32).reshape(-1, len(CHANNELS)), (self.fleet.systems, 1))
+
+
+class Telemetry:
+    """全センサーの読み取り値をまとめて生成し、リングバッファに保持する
+
+    読み取り値は NumPy の配列 (履歴, センサー, チャネル) で一括更新し、GET では最新の値を返す。
+    """
+
+    def __init__(self, indexes: list, history: int = 10, seed: int = 0):
+        self._indexes = [index for index in indexes if index.count]
+        self._offsets = np.cumsum([0] + [index.count for index in self._indexes]).tolist()
+        self.count = self._offsets[-1]
+        rng = np.random.default_rng(seed)
+        base = np.concatenate([index.bases() for index in self._indexes]) if self._indexes else np.zeros((0, len(CHANNELS)), np.float32)
+        # センサーごとに基準値を少しずらす（シードが同じなら毎回同じ）
+        self._base = (base * (1 + 0.05 * rng.standard_normal(base.shape))).astype(np.float32)
+        self._present = self._base != 0             # センサーごとに元からあるチャネル
+        self._caution = self._base[:, 0] + CAUTION
+        self._buffer = np.empty((history, self.count, len(CHANNELS)), np.float32)
+        self._buffer[:] = self._base
+        self._rng = rng
+        self._head = 0
+        self.tick = 0
+        self.timestamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self._served: dict[str, tuple[int, Resource]] = {}                  # URI → (tick, 現在値を入れたリソース)
+        self._report = self._metric_report()
+        self.listeners: list[Callable[[list[str]], None]] = []             # 値が変わった URI の通知先
+
+    def attach(self, store: ResourceStore):
+        store.filters.append(self.filter)
+
+    def row(self, key: str) -> int | None:
+        for offset, index in zip(self._offsets, self._indexes):
+            row = index.row(key)
+            if row is not None:
+                return offset + row
+        return None
+
+    def uri(self, row: int) -> str:
+        for offset, index in zip(self._offsets, self._indexes):
+            if row < offset + index.count:
+                return index.uri(row - offset)
+        raise IndexError(row)
+
+    def current(self, row: int) -> np.ndarray:
+        return self._buffer[self._head, row]
+
+    def filter(self, key: str, resource: Resource) -> Resource:
+        """メトリクスと MetricReport を現在値に差し替える（同じ tick の間は使い回す）"""
+        if key == REPORT:
+            return self._report
+        if not key.endswith(METRICS):
+            return resource
+        served = self._served.get(key)
+        if served is not None and served[0] == self.tick:
+            return served[1]
+        row = self.row(key)
+        if row is None:
+            return resource
+        tick = self.tick
+        current = Resource(apply(resource.doc, self.current(row)))
+        self._served[key] = (tick, current)
+        return current
+
+    def step(self) -> np.ndarray:
+        """全センサーを 1 ステップ進め、警告しきい値を超えたセンサー番号を返す"""
+        previous = self._buffer[self._head]
+        noise = self._rng.standard_normal(previous.shape, dtype=np.float32) * SIGMA
+        noise[:, 1] *= self._base[:, 1]
+        noise[~self._present] = 0                   # 元から無いチャネルは動かさない
+        values = previous + THETA * (self._base - previous) + noise
+        np.clip(values, 0, None, out=values)
+        values[:, PERCENT] = np.minimum(values[:, PERCENT], 100)
+        head = (self._head + 1) % len(self._buffer)
+        self._buffer[head] = values
+        crossed = np.flatnonzero((previous[:, 0] < self._caution) & (values[:, 0] >= self._caution))
+        self._head = head
+        self.tick += 1
+        self.timestamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self._report = self._metric_report()
+        return crossed
+
+    def _metric_report(self) -> Resource:
+        current = self._buffer[self._head]
+        window = self._buffer.mean(axis=0) if self.count else current
+        values = []
+        for channel, name in enumerate(CHANNELS):
+            # そのチャネルを持つセンサーだけで集計する（持つセンサーが無ければ載せない）
+            present = self._present[:, channel]
+            if not present.any():
+                continue
+            column = current[present, channel]
+            for suffix, value in (("Min", column.min()), ("Average", window[present, channel].mean()), ("Max", column.max())):
+                values.append({"MetricId": name + suffix, "MetricValue": f"{value:.2f}", "Timestamp": self.timestamp})
+        # 温度の高いセンサー上位
+        hottest = np.argpartition(-current[:, 0], min(TOP, self.count) - 1)[:TOP] if self.count else []
+        for row in sorted(hottest, key=lambda row: -current[row, 0]):
+            values.append({"MetricId": "TemperatureCelsius", "MetricValue": f"{current[row, 0]:.2f}", "MetricProperty": self.uri(int(row)) + "#/TemperatureCelsius", "Timestamp": self.timestamp})
+        return Resource({"@odata.type": "#MetricReport.v1_5_0.MetricReport", "Id": "Telemetry", "Name": "Telemetry Metric Report", "ReportSequence": str(self.tick), "Timestamp": self.timestamp, "MetricValues": values, "@odata.id": REPORT})
+
+    def alerts(self, rows: np.ndarray) -> list[dict]:
+        """しきい値を超えたセンサーの Event レコード"""
+        return [{
+            "EventType": "Alert",
+            "EventTimestamp": self.timestamp,
+            "Severity": "Warning",
+            "MessageSeverity": "Warning",
+            "MessageId": "SensorEvent.1.0.ReadingAboveUpperCautionThreshold",
+            "Message": f"Reading {self.current(int(row))[0]:.2f} for {self.uri(int(row))} exceeds the upper caution threshold {self._caution[row]:.2f}.",
+            "MessageArgs": [self.uri(int(row)), f"{self.current(int(row))[0]:.2f}", f"{self._caution[row]:.2f}"],
+            "OriginOfCondition": {"@odata.id": self.uri(int(row))},
+        } for row in rows[:MAX_EVENTS]]
+
+    async def run(self, interval: float, events):
+        """interval 秒ごとに値を進めて MetricReport と警告を配信する（失敗してもログに残して続ける）"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                crossed = await asyncio.to_thread(self.step)
+                served, self._served = self._served, {}
+                keys = list(served) + [REPORT]
+                for listener in self.listeners:
+                    listener(keys)
+                events.publish("MetricReport", self._report.doc)
+                if len(crossed):
+                    events.publish("Event", {"Events": self.alerts(crossed)})
+            except Exception:
+                logger.exception("Telemetry update %d failed.", self.tick)
@@ -0,0 +1,118 @@
+# ---------------------------------------------------------------------------
+# Copyright (c) 2023-2026 Tabito's Works. All rights reserved.
+#
+# This software is released under the MIT License.
+# https://opensource.org/licenses/MIT
+# ---------------------------------------------------------------------------
+import compress
+from store import Members, RedfishError, Resource, ResourceStore, etag_matches, normalize
+
+ROOT = "/redfish/v1"
+# クライアントからは変更できないプロパティ
+READ_ONLY = ("@odata.id", "@odata.type", "@odata.etag", "@odata.context", "Id", "Members", "Members@odata.count", "Members@odata.nextLink")
+
+
+def merge(doc: dict, changes: dict) -> dict:
+    """PATCH の内容を重ねた新しいドキュメントを返す（変更しない部分木は元と共有する）"""
+    merged = dict(doc)
+    for key, value in changes.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def check_body(body) -> dict:
+    if not isinstance(body, dict):
+        raise RedfishError(400, "Base.1.0.MalformedJSON", "The request body submitted was malformed JSON and could not be parsed by the receiving service.")
+    for key in body:
+        if key in READ_ONLY:
+            raise RedfishError(400, "Base.1.0.PropertyNotWritable", f"The property {key} is a read only property and cannot be assigned a value.")
+    return body
+
+
+def check_if_match(resource: Resource, header: str | None):
+    """If-Match を強い比較で検証する（圧縮表現の ETag も受け付ける）"""
+    if header is None:
+        return
+    tags = [resource.etag] + [compress.tag(resource.etag, encoding) for encoding in compress.ENCODINGS]
+    if not any(etag_matches(header, tag, weak=False) for tag in tags):
+        raise RedfishError(412, "Base.1.0.PreconditionFailed", "The ETag supplied did not match the ETag required to change this resource.")
+
+
+def existing(store: ResourceStore, uri: str) -> Resource:
+    resource = store.resource(uri)
+    if resource is None:
+        raise RedfishError(404, "Base.1.0.ResourceMissingAtURI", f"The resource at the URI {uri} was not found.")
+    return resource
+
+
+def patch(store: ResourceStore, uri: str, body, if_match: str | None = None) -> Resource:
+    changes = check_body(body)
+    with store.lock:
+        current = existing(store, uri)
+        check_if_match(current, if_match)
+        return store.replace(uri, merge(current.doc, changes))
+
+
+def put(store: ResourceStore, uri: str, body, if_match: str | None = None) -> Resource:
+    replacement = check_body(body)
+    with store.lock:
+        current = existing(store, uri)
+        check_if_match(current, if_match)
+        doc = {key: current.doc[key] for key in READ_ONLY if key in current.doc and key != "@odata.etag"}
+        return store.replace(uri, {**doc, **replacement})
+
+
+def post(store: ResourceStore, uri: str, body) -> Resource | None:
+    """コレクションにメンバーを追加する（アクションは受け付けるだけで None を返す）"""
+    key = normalize(uri)
+    with store.lock:
+        if "/Actions/" in key:
+            existing(store, key.split("/Actions/", 1)[0])
+            return None
+        collection = existing(store, key)
+        if not collection.collection:
+            raise RedfishError(405, "Base.1.0.OperationNotAllowed", f"The HTTP method POST is not allowed on the URI {uri}.")
+        fields = check_body({k: v for k, v in body.items() if k != "Id"} if isinstance(body, dict) else body)
+        members = collection.doc["Members"]
+        # Id が無ければ空いている連番を使う
+        id = body.get("Id")
+        if not isinstance(id, str) or not id or "/" in id:
+            n = len(members) + 1
+            while store.resource(f"{key}/{n}") is not None:
+                n += 1
+            id = str(n)
+        member = f"{key}/{id}"
+        if store.resource(member) is not None:
+            raise RedfishError(400, "Base.1.0.ResourceAlreadyExists", f"The requested resource {member} already exists.")
+        doc = {"@odata.id": member, "Id": id, **fields}
+        sibling = store.resource(members[0]["@odata.id"]) if members else None
+        if sibling is not None and "@odata.type" in sibling.doc:
+            doc = {"@odata.type": sibling.doc["@odata.type"], **doc}
+        created = store.replace(member, doc)
+        # 遅延生成の Members は全件を作らずに末尾へ加えたことだけを覚える
+        members = members.plus(member) if isinstance(members, Members) else [*members, {"@odata.id": member}]
+        store.replace(key, {**collection.doc, "Members@odata.count": len(members), "Members": members})
+        return created
+
+
+def delete(store: ResourceStore, uri: str, if_match: str | None = None):
+    key = normalize(uri)
+    with store.lock:
+        current = existing(store, key)
+        if key == ROOT:
+            raise RedfishError(405, "Base.1.0.OperationNotAllowed", f"The HTTP method DELETE is not allowed on the URI {uri}.")
+        check_if_match(current, if_match)
+        store.delete(key)
+        # 親コレクションからも外す
+        parent_key = key.rsplit("/", 1)[0]
+        parent = store.resource(parent_key)
+        if parent is not None and parent.collection:
+            members = parent.doc["Members"]
+            if isinstance(members, Members):
+                members = members.without(key)
+            else:
+                members = [m for m in members if normalize(m["@odata.id"]) != key]
+            store.replace(parent_key, {**parent.doc, "Members@odata.count": len(members), "Members": members})